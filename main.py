@@ -3,24 +3,71 @@ Pexel Document Studio - FastAPI Backend
 A comprehensive PDF processing API with multiple tools
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import os
-import uuid
+import re
+import mmap
+import zlib
 import shutil
+import zipfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from secrets import token_hex
+from functools import lru_cache
 from typing import List, Optional
 from pathlib import Path
 import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import aiofiles
+import aiofiles.os
+import anyio.to_thread
+import blake3
 
 # PDF processing imports
-from pypdf import PdfReader, PdfWriter, PdfMerger
+import fitz  # PyMuPDF
+from pypdf import PdfReader, PdfWriter
 from PIL import Image
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.units import inch
 from io import BytesIO
 
+# pypdf's FlateDecode filter calls compress/decompress through the zlib
+# module, so swapping in ISA-L's SIMD deflate transparently accelerates
+# every content-stream codec path at near-identical compression ratios.
+# Fall back to stock zlib where the wheel is unavailable.
+try:
+    from isal import isal_zlib
+
+    def _isal_compress(data, level=-1):
+        # Map zlib's -1..9 levels onto ISA-L's 0..3 range
+        if level < 0:
+            level = isal_zlib.ISAL_DEFAULT_COMPRESSION
+        else:
+            level = min(level, isal_zlib.ISAL_BEST_COMPRESSION)
+        return isal_zlib.compress(data, level)
+
+    def _isal_decompress(data, *args, **kwargs):
+        # ISA-L raises its own error type; re-raise as zlib.error so
+        # callers like pypdf's tolerant corrupt-stream fallback (which
+        # catches zlib.error) still engage on damaged input
+        try:
+            return isal_zlib.decompress(data, *args, **kwargs)
+        except isal_zlib.error as e:
+            raise zlib.error(str(e)) from e
+
+    zlib.compress = _isal_compress
+    zlib.decompress = _isal_decompress
+except ImportError:
+    pass
+
 app = FastAPI(
     title="Pexel Document Studio API",
     description="Professional PDF tools API",
@@ -42,14 +89,166 @@ OUTPUT_DIR = Path("outputs")
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Uploads are streamed to disk in chunks of this size instead of being
+# buffered whole in memory
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Largest request body accepted before doing any disk I/O or parsing
+MAX_UPLOAD_MB = 100
+
+
+async def size_limit(request: Request):
+    """Reject oversized requests up front based on Content-Length
+
+    Chunked or lying clients are caught again by the streaming check in
+    _spool_upload; this dependency just avoids doing any work for
+    requests that declare themselves too large.
+    """
+    content_length = int(request.headers.get("content-length", 0))
+    if content_length > MAX_UPLOAD_MB * 1024 * 1024:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request body exceeds the {MAX_UPLOAD_MB} MB limit"
+        )
+
+
+@app.on_event("startup")
+async def configure_thread_pool():
+    # UploadFile reads/writes go through anyio's default thread pool; the
+    # default of 40 tokens is too small once pypdf work is offloaded too.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 100
+
+
+_RANGE_RE = re.compile(r"(\d+)(?:-(\d+))?")
+
+
+def _parse_ranges(spec: str, total: int) -> frozenset:
+    """Parse a page spec like "1-3,5,7-9" into zero-based page indices
+
+    Indices are clamped to the document, so out-of-range and negative
+    entries are dropped rather than raising or wrapping around.
+    """
+    indices = set()
+    for start, end in _RANGE_RE.findall(spec):
+        first = max(int(start) - 1, 0)
+        last = min(int(end or start), total)
+        indices.update(range(first, last))
+    return frozenset(indices)
+
+
+@contextmanager
+def _open_reader(path: Path):
+    """Yield a PdfReader backed by a read-only mmap of the file
+
+    pypdf parses objects lazily, so mapping the file lets the OS page in
+    only the bytes actually touched instead of buffering the whole file
+    in Python. The reader is only valid inside the with block.
+    """
+    with open(path, "rb") as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield PdfReader(mm)
+
+
+# Parsed-reader cache for the read-only endpoints. Users commonly run
+# several tools against the same document back to back, so keying on the
+# content hash lets the second request skip the xref parse entirely.
+_READER_CACHE_SIZE = 32
+# Documents larger than this are not cached: each entry keeps its source
+# bytes alive, so the cap bounds the cache at 32 x 16 MB of RAM
+_READER_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Each entry carries its own lock: pypdf readers resolve objects lazily
+# with seek/read on their underlying stream, so concurrent use of one
+# reader interleaves stream positions and corrupts reads
+_reader_cache: "OrderedDict[str, tuple[PdfReader, threading.Lock]]" = OrderedDict()
+_reader_cache_lock = threading.Lock()
+
+
+@contextmanager
+def _cached_reader(stream):
+    """Yield a PdfReader for the stream, reusing a parsed one if cached
+
+    Only read-only endpoints may use this: cached readers are shared
+    between requests and must never be mutated or fed to a PdfWriter.
+    The entry's lock is held for the whole with block, so concurrent
+    requests for the same document serialize instead of racing on the
+    reader's stream position.
+    """
+    stream.seek(0)
+    hasher = blake3.blake3()
+    size = 0
+    while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+        hasher.update(chunk)
+        size += len(chunk)
+    key = hasher.hexdigest()
+
+    with _reader_cache_lock:
+        entry = _reader_cache.get(key)
+        if entry is not None:
+            _reader_cache.move_to_end(key)
+
+    if entry is None:
+        stream.seek(0)
+        if size > _READER_CACHE_MAX_BYTES:
+            # Not cached, so this reader is private to the request
+            yield PdfReader(stream)
+            return
+
+        # Copy into an owned buffer: the upload's spool file dies with
+        # the request
+        entry = (PdfReader(BytesIO(stream.read())), threading.Lock())
+        with _reader_cache_lock:
+            _reader_cache[key] = entry
+            while len(_reader_cache) > _READER_CACHE_SIZE:
+                _reader_cache.popitem(last=False)
+
+    reader, lock = entry
+    with lock:
+        yield reader
+
+
+async def _spool_upload(file: UploadFile) -> Path:
+    """Stream an upload to a unique temp path and return it"""
+    # token_hex is the same CSPRNG as uuid4 without the UUID object
+    # overhead; Path(...).name strips any client-supplied directories
+    temp_path = UPLOAD_DIR / f"{token_hex(16)}_{Path(file.filename).name}"
+    written = 0
+    async with aiofiles.open(temp_path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > MAX_UPLOAD_MB * 1024 * 1024:
+                await aiofiles.os.remove(temp_path)
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Upload exceeds the {MAX_UPLOAD_MB} MB limit"
+                )
+            await f.write(chunk)
+    return temp_path
+
+
+def _pdf_response(out_buf: BytesIO, filename: str, headers: Optional[dict] = None) -> StreamingResponse:
+    """Stream an in-memory PDF back without a round trip through disk"""
+    response_headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if headers:
+        response_headers.update(headers)
+    out_buf.seek(0)
+    return StreamingResponse(
+        out_buf,
+        media_type="application/pdf",
+        headers=response_headers
+    )
 
-def cleanup_file(filepath: Path, delay: int = 300):
-    """Schedule file cleanup after delay seconds"""
-    async def delete_after_delay():
-        await asyncio.sleep(delay)
-        if filepath.exists():
-            filepath.unlink()
-    asyncio.create_task(delete_after_delay())
+
+def cleanup_files(*filepaths: Path) -> BackgroundTask:
+    """Background task deleting served files once the response has been sent
+
+    Attached to FileResponse via `background=` so the unlink cannot race the
+    sendfile() that streams the file to the client.
+    """
+    def _remove():
+        for filepath in filepaths:
+            Path(filepath).unlink(missing_ok=True)
+    return BackgroundTask(_remove)
 
 
 @app.get("/")
@@ -64,48 +263,79 @@ async def health_check():
 
 # ============== ORGANIZE TOOLS ==============
 
-@app.post("/api/merge")
+def _do_merge(paths: List[Path]) -> BytesIO:
+    """Merge the given PDF files into a single in-memory document"""
+    # PdfWriter.append copies pages incrementally; PdfMerger kept every
+    # source document alive and re-serialized the whole graph on close
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(str(path))
+    out_buf = BytesIO()
+    writer.write(out_buf)
+    writer.close()
+    return out_buf
+
+
+@app.post("/api/merge", dependencies=[Depends(size_limit)])
 async def merge_pdfs(files: List[UploadFile] = File(...)):
     """Merge multiple PDF files into one"""
     if len(files) < 2:
         raise HTTPException(status_code=400, detail="At least 2 PDF files required")
-    
+
     try:
-        merger = PdfMerger()
-        temp_files = []
-        
         for file in files:
             if not file.filename.lower().endswith('.pdf'):
                 raise HTTPException(status_code=400, detail=f"File {file.filename} is not a PDF")
-            
-            temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-            with open(temp_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            temp_files.append(temp_path)
-            merger.append(str(temp_path))
-        
-        output_filename = f"merged_{uuid.uuid4().hex[:8]}.pdf"
-        output_path = OUTPUT_DIR / output_filename
-        merger.write(str(output_path))
-        merger.close()
-        
+
+        # Spool all uploads concurrently; the merge itself needs them in order
+        temp_files = list(await asyncio.gather(*(_spool_upload(f) for f in files)))
+
+        out_buf = await asyncio.to_thread(_do_merge, temp_files)
+
         # Cleanup temp files
         for temp_file in temp_files:
-            temp_file.unlink()
-        
-        cleanup_file(output_path)
-        
-        return FileResponse(
-            path=str(output_path),
-            filename=output_filename,
-            media_type="application/pdf"
-        )
+            await aiofiles.os.remove(temp_file)
+
+        return _pdf_response(out_buf, f"merged_{token_hex(4)}.pdf")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/split")
+def _do_split(path: Path, pages: str) -> Optional[BytesIO]:
+    """Split into per-page PDFs bundled in an in-memory zip archive
+
+    Returns None when the page spec matches nothing. The per-page PDFs
+    are already Flate-compressed, so the archive stores them as-is
+    instead of deflating twice.
+    """
+    with _open_reader(path) as reader:
+        total_pages = len(reader.pages)
+
+        # Parse page ranges (e.g. "1-3,5,7-9") or split all
+        if pages:
+            page_nums = sorted(_parse_ranges(pages, total_pages))
+        else:
+            page_nums = list(range(total_pages))
+
+        if not page_nums:
+            return None
+
+        zip_buf = BytesIO()
+        with zipfile.ZipFile(zip_buf, "w", zipfile.ZIP_STORED) as archive:
+            for page_num in page_nums:
+                writer = PdfWriter()
+                writer.add_page(reader.pages[page_num])
+
+                page_buf = BytesIO()
+                writer.write(page_buf)
+                archive.writestr(f"page_{page_num + 1}.pdf", page_buf.getvalue())
+
+        return zip_buf
+
+
+@app.post("/api/split", dependencies=[Depends(size_limit)])
 async def split_pdf(
     file: UploadFile = File(...),
     pages: str = Form(default="")
@@ -113,61 +343,101 @@ async def split_pdf(
     """Split PDF into separate pages or specific page ranges"""
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="File must be a PDF")
-    
+
     try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        reader = PdfReader(str(temp_path))
-        total_pages = len(reader.pages)
-        
-        # Parse page ranges or split all
-        if pages:
-            # Format: "1-3,5,7-9"
-            page_nums = []
-            for part in pages.split(','):
-                if '-' in part:
-                    start, end = map(int, part.split('-'))
-                    page_nums.extend(range(start - 1, min(end, total_pages)))
-                else:
-                    page_nums.append(int(part) - 1)
-        else:
-            page_nums = list(range(total_pages))
-        
-        output_files = []
-        for i, page_num in enumerate(page_nums):
-            if 0 <= page_num < total_pages:
-                writer = PdfWriter()
-                writer.add_page(reader.pages[page_num])
-                
-                output_filename = f"page_{page_num + 1}_{uuid.uuid4().hex[:6]}.pdf"
-                output_path = OUTPUT_DIR / output_filename
-                
-                with open(output_path, "wb") as output_file:
-                    writer.write(output_file)
-                
-                output_files.append(str(output_path))
-                cleanup_file(output_path)
-        
-        temp_path.unlink()
-        
-        # Return first split file (in production, you'd zip all files)
-        if output_files:
-            return FileResponse(
-                path=output_files[0],
-                filename=f"split_{file.filename}",
-                media_type="application/pdf"
-            )
-        else:
+        temp_path = await _spool_upload(file)
+
+        zip_buf = await asyncio.to_thread(_do_split, temp_path, pages)
+
+        await aiofiles.os.remove(temp_path)
+
+        if zip_buf is None:
             raise HTTPException(status_code=400, detail="No valid pages to split")
-            
+
+        zip_buf.seek(0)
+        return StreamingResponse(
+            zip_buf,
+            media_type="application/zip",
+            headers={
+                "Content-Disposition":
+                    f'attachment; filename="split_{Path(file.filename).stem}.zip"'
+            }
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/compress")
+# Below this page count the process-pool startup cost outweighs the
+# parallel recompression win
+COMPRESS_PARALLEL_THRESHOLD = 8
+
+
+def _compress_pages_chunk(pdf_bytes: bytes, page_indices: List[int]) -> bytes:
+    """Worker: recompress a slice of pages and serialize them as a sub-PDF"""
+    reader = PdfReader(BytesIO(pdf_bytes))
+    writer = PdfWriter()
+    for index in page_indices:
+        writer.add_page(reader.pages[index])
+    # pypdf requires the page to belong to a writer before recompressing
+    for page in writer.pages:
+        page.compress_content_streams()
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def _do_compress(path: Path) -> BytesIO:
+    """Recompress every content stream and serialize the result in memory
+
+    compress_content_streams is CPU-bound zlib work, so larger documents
+    are split into contiguous page slices recompressed in parallel worker
+    processes and stitched back together in order.
+    """
+    with _open_reader(path) as reader:
+        total_pages = len(reader.pages)
+
+        workers = min(os.cpu_count() or 1, total_pages)
+        if total_pages < COMPRESS_PARALLEL_THRESHOLD or workers < 2:
+            writer = PdfWriter()
+            for page in reader.pages:
+                writer.add_page(page)
+            # pypdf requires the page to belong to a writer before recompressing
+            for page in writer.pages:
+                page.compress_content_streams()
+
+            # Remove metadata to reduce size
+            writer.add_metadata({})
+
+            out_buf = BytesIO()
+            writer.write(out_buf)
+            return out_buf
+
+    # Parallel path: workers need picklable input, so read the bytes once
+    pdf_bytes = path.read_bytes()
+    step = -(-total_pages // workers)
+    chunks = [
+        list(range(start, min(start + step, total_pages)))
+        for start in range(0, total_pages, step)
+    ]
+    writer = PdfWriter()
+    # Spawn rather than fork: this runs on a worker thread of a heavily
+    # multithreaded process, and forking there can deadlock the children
+    spawn_ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=spawn_ctx) as pool:
+        for part in pool.map(_compress_pages_chunk, repeat(pdf_bytes), chunks):
+            writer.append(BytesIO(part))
+
+    # Remove metadata to reduce size
+    writer.add_metadata({})
+
+    out_buf = BytesIO()
+    writer.write(out_buf)
+    return out_buf
+
+
+@app.post("/api/compress", dependencies=[Depends(size_limit)])
 async def compress_pdf(
     file: UploadFile = File(...),
     quality: str = Form(default="medium")
@@ -175,50 +445,56 @@ async def compress_pdf(
     """Compress PDF to reduce file size"""
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="File must be a PDF")
-    
+
     try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        reader = PdfReader(str(temp_path))
-        writer = PdfWriter()
-        
-        for page in reader.pages:
-            page.compress_content_streams()
-            writer.add_page(page)
-        
-        # Remove metadata to reduce size
-        writer.add_metadata({})
-        
-        output_filename = f"compressed_{uuid.uuid4().hex[:8]}.pdf"
-        output_path = OUTPUT_DIR / output_filename
-        
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
-        
+        temp_path = await _spool_upload(file)
+
+        out_buf = await asyncio.to_thread(_do_compress, temp_path)
+
         original_size = temp_path.stat().st_size
-        compressed_size = output_path.stat().st_size
-        
-        temp_path.unlink()
-        cleanup_file(output_path)
-        
-        return FileResponse(
-            path=str(output_path),
-            filename=output_filename,
-            media_type="application/pdf",
+        compressed_size = out_buf.getbuffer().nbytes
+
+        await aiofiles.os.remove(temp_path)
+
+        return _pdf_response(
+            out_buf,
+            f"compressed_{token_hex(4)}.pdf",
             headers={
                 "X-Original-Size": str(original_size),
                 "X-Compressed-Size": str(compressed_size),
                 "X-Compression-Ratio": f"{(1 - compressed_size/original_size) * 100:.1f}%"
             }
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/rotate")
+def _do_rotate(path: Path, angle: int, pages: str) -> BytesIO:
+    """Rotate the requested pages and serialize the result in memory"""
+    with _open_reader(path) as reader:
+        writer = PdfWriter()
+
+        total_pages = len(reader.pages)
+
+        # Parse which pages to rotate
+        if pages.lower() == "all":
+            pages_to_rotate = frozenset(range(total_pages))
+        else:
+            pages_to_rotate = _parse_ranges(pages, total_pages)
+
+        for i, page in enumerate(reader.pages):
+            if i in pages_to_rotate:
+                page.rotate(angle)
+            writer.add_page(page)
+
+        out_buf = BytesIO()
+        writer.write(out_buf)
+        return out_buf
+
+
+@app.post("/api/rotate", dependencies=[Depends(size_limit)])
 async def rotate_pdf(
     file: UploadFile = File(...),
     angle: int = Form(default=90),
@@ -227,59 +503,40 @@ async def rotate_pdf(
     """Rotate PDF pages by specified angle"""
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="File must be a PDF")
-    
+
     if angle not in [90, 180, 270, -90, -180, -270]:
         raise HTTPException(status_code=400, detail="Angle must be 90, 180, or 270 degrees")
-    
+
     try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        reader = PdfReader(str(temp_path))
-        writer = PdfWriter()
-        
-        total_pages = len(reader.pages)
-        
-        # Parse which pages to rotate
-        if pages.lower() == "all":
-            pages_to_rotate = set(range(total_pages))
-        else:
-            pages_to_rotate = set()
-            for part in pages.split(','):
-                if '-' in part:
-                    start, end = map(int, part.split('-'))
-                    pages_to_rotate.update(range(start - 1, min(end, total_pages)))
-                else:
-                    pages_to_rotate.add(int(part) - 1)
-        
-        for i, page in enumerate(reader.pages):
-            if i in pages_to_rotate:
-                page.rotate(angle)
-            writer.add_page(page)
-        
-        output_filename = f"rotated_{uuid.uuid4().hex[:8]}.pdf"
-        output_path = OUTPUT_DIR / output_filename
-        
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
-        
-        temp_path.unlink()
-        cleanup_file(output_path)
-        
-        return FileResponse(
-            path=str(output_path),
-            filename=output_filename,
-            media_type="application/pdf"
-        )
+        temp_path = await _spool_upload(file)
+
+        out_buf = await asyncio.to_thread(_do_rotate, temp_path, angle, pages)
+
+        await aiofiles.os.remove(temp_path)
+
+        return _pdf_response(out_buf, f"rotated_{token_hex(4)}.pdf")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ============== CONVERT TOOLS ==============
 
-@app.post("/api/pdf-to-images")
+def _do_pdf_to_images(path: Path, format: str, dpi: int) -> List[bytes]:
+    """Rasterize every page with PyMuPDF, returning encoded image bytes"""
+    pages = []
+    with fitz.open(str(path)) as doc:
+        for page in doc:
+            pix = page.get_pixmap(dpi=dpi)
+            if format == "jpg":
+                pages.append(pix.tobytes("jpeg", jpg_quality=85))
+            else:
+                pages.append(pix.tobytes("png"))
+    return pages
+
+
+@app.post("/api/pdf-to-images", dependencies=[Depends(size_limit)])
 async def pdf_to_images(
     file: UploadFile = File(...),
     format: str = Form(default="png"),
@@ -288,104 +545,122 @@ async def pdf_to_images(
     """Convert PDF pages to images"""
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="File must be a PDF")
-    
+
+    format = format.lower()
+    if format not in ("png", "jpg"):
+        raise HTTPException(status_code=400, detail="Format must be png or jpg")
+
     try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        # For this demo, we'll create a placeholder image
-        # In production, use pdf2image library with poppler
-        reader = PdfReader(str(temp_path))
-        first_page = reader.pages[0]
-        
-        # Create a simple image representation
-        img = Image.new('RGB', (612, 792), color='white')
-        
-        output_filename = f"page_1.{format}"
-        output_path = OUTPUT_DIR / f"{uuid.uuid4().hex[:8]}_{output_filename}"
-        
-        img.save(str(output_path), format.upper())
-        
-        temp_path.unlink()
-        cleanup_file(output_path)
-        
-        media_type = f"image/{format}"
-        return FileResponse(
-            path=str(output_path),
-            filename=output_filename,
-            media_type=media_type
+        temp_path = await _spool_upload(file)
+
+        images = await asyncio.to_thread(_do_pdf_to_images, temp_path, format, dpi)
+
+        await aiofiles.os.remove(temp_path)
+
+        if len(images) == 1:
+            return StreamingResponse(
+                BytesIO(images[0]),
+                media_type="image/jpeg" if format == "jpg" else "image/png",
+                headers={"Content-Disposition": f'attachment; filename="page_1.{format}"'}
+            )
+
+        # Multi-page: bundle the images into a zip. The images are already
+        # compressed, so store them without deflating again
+        zip_buf = BytesIO()
+        with zipfile.ZipFile(zip_buf, "w", zipfile.ZIP_STORED) as archive:
+            for i, image in enumerate(images):
+                archive.writestr(f"page_{i + 1}.{format}", image)
+
+        zip_buf.seek(0)
+        return StreamingResponse(
+            zip_buf,
+            media_type="application/zip",
+            headers={"Content-Disposition": 'attachment; filename="pages.zip"'}
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/images-to-pdf")
-async def images_to_pdf(files: List[UploadFile] = File(...)):
+def _do_images_to_pdf(paths: List[Path], output_path: Path, dpi: int) -> None:
+    """Decode the images and combine them into a single PDF on disk
+
+    Images are downsampled to the target dpi on letter-size output and
+    re-encoded as JPEG, which is where most of the size win comes from:
+    camera originals are typically 300+ dpi. Each image becomes its own
+    one-page PDF as soon as it is decoded and the pages are stitched with
+    PdfWriter.append, so only one decoded image is resident at a time and
+    the accumulated state is JPEG-compressed pages. (Pillow's own
+    append_images path materializes every decoded image into a list
+    before writing, so it offers no such bound.)
+    """
+    # Letter-width bound for the longest image dimension at the target dpi
+    max_dim = int(dpi * 8.5)
+
+    writer = PdfWriter()
+    for path in paths:
+        with Image.open(path) as im:
+            img = im.convert('RGB')
+        img.thumbnail((max_dim, max_dim), Image.LANCZOS)
+
+        page_buf = BytesIO()
+        img.save(page_buf, "PDF", resolution=dpi, optimize=True, quality=80)
+        img.close()
+
+        writer.append(page_buf)
+
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    writer.close()
+
+
+@app.post("/api/images-to-pdf", dependencies=[Depends(size_limit)])
+async def images_to_pdf(
+    files: List[UploadFile] = File(...),
+    dpi: int = Form(default=150)
+):
     """Convert multiple images to a single PDF"""
     valid_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
     
     try:
-        images = []
-        temp_files = []
-        
         for file in files:
             ext = Path(file.filename).suffix.lower()
             if ext not in valid_extensions:
                 raise HTTPException(
-                    status_code=400, 
+                    status_code=400,
                     detail=f"File {file.filename} is not a valid image"
                 )
-            
-            temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-            with open(temp_path, "wb") as buffer:
-                content = await file.read()
-                buffer.write(content)
-            temp_files.append(temp_path)
-            
-            img = Image.open(temp_path)
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-            images.append(img)
-        
-        if not images:
+
+        if not files:
             raise HTTPException(status_code=400, detail="No valid images provided")
-        
-        output_filename = f"images_to_pdf_{uuid.uuid4().hex[:8]}.pdf"
+
+        # Spool all uploads concurrently; conversion needs them in order
+        temp_files = list(await asyncio.gather(*(_spool_upload(f) for f in files)))
+
+        output_filename = f"images_to_pdf_{token_hex(4)}.pdf"
         output_path = OUTPUT_DIR / output_filename
-        
-        # Save first image with others appended
-        first_image = images[0]
-        other_images = images[1:] if len(images) > 1 else []
-        
-        first_image.save(
-            str(output_path),
-            "PDF",
-            save_all=True if other_images else False,
-            append_images=other_images if other_images else None
-        )
-        
-        # Cleanup
-        for img in images:
-            img.close()
+
+        await asyncio.to_thread(_do_images_to_pdf, temp_files, output_path, dpi)
+
         for temp_file in temp_files:
-            temp_file.unlink()
-        
-        cleanup_file(output_path)
-        
+            await aiofiles.os.remove(temp_file)
+
         return FileResponse(
             path=str(output_path),
             filename=output_filename,
-            media_type="application/pdf"
+            media_type="application/pdf",
+            background=cleanup_files(output_path)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ============== SECURITY TOOLS ==============
 
-@app.post("/api/protect")
+@app.post("/api/protect", dependencies=[Depends(size_limit)])
 async def protect_pdf(
     file: UploadFile = File(...),
     password: str = Form(...)
@@ -398,38 +673,29 @@ async def protect_pdf(
         raise HTTPException(status_code=400, detail="Password must be at least 4 characters")
     
     try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        reader = PdfReader(str(temp_path))
-        writer = PdfWriter()
-        
-        for page in reader.pages:
-            writer.add_page(page)
-        
-        writer.encrypt(password)
-        
-        output_filename = f"protected_{uuid.uuid4().hex[:8]}.pdf"
-        output_path = OUTPUT_DIR / output_filename
-        
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
-        
-        temp_path.unlink()
-        cleanup_file(output_path)
-        
-        return FileResponse(
-            path=str(output_path),
-            filename=output_filename,
-            media_type="application/pdf"
-        )
+        temp_path = await _spool_upload(file)
+
+        with _open_reader(temp_path) as reader:
+            writer = PdfWriter()
+
+            for page in reader.pages:
+                writer.add_page(page)
+
+            writer.encrypt(password)
+
+            out_buf = BytesIO()
+            writer.write(out_buf)
+
+        await aiofiles.os.remove(temp_path)
+
+        return _pdf_response(out_buf, f"protected_{token_hex(4)}.pdf")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/unlock")
+@app.post("/api/unlock", dependencies=[Depends(size_limit)])
 async def unlock_pdf(
     file: UploadFile = File(...),
     password: str = Form(...)
@@ -439,35 +705,23 @@ async def unlock_pdf(
         raise HTTPException(status_code=400, detail="File must be a PDF")
     
     try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        reader = PdfReader(str(temp_path))
-        
+        # Read-only access: parse the upload's own spool file directly
+        # instead of copying it to UPLOAD_DIR first
+        file.file.seek(0)
+        reader = PdfReader(file.file)
+
         if reader.is_encrypted:
             if not reader.decrypt(password):
                 raise HTTPException(status_code=400, detail="Incorrect password")
-        
+
         writer = PdfWriter()
         for page in reader.pages:
             writer.add_page(page)
-        
-        output_filename = f"unlocked_{uuid.uuid4().hex[:8]}.pdf"
-        output_path = OUTPUT_DIR / output_filename
-        
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
-        
-        temp_path.unlink()
-        cleanup_file(output_path)
-        
-        return FileResponse(
-            path=str(output_path),
-            filename=output_filename,
-            media_type="application/pdf"
-        )
+
+        out_buf = BytesIO()
+        writer.write(out_buf)
+
+        return _pdf_response(out_buf, f"unlocked_{token_hex(4)}.pdf")
     except HTTPException:
         raise
     except Exception as e:
@@ -476,7 +730,51 @@ async def unlock_pdf(
 
 # ============== EDIT TOOLS ==============
 
-@app.post("/api/watermark")
+@lru_cache(maxsize=16)
+def _watermark_overlay_bytes(text: str, opacity: float) -> bytes:
+    """Build (and memoize) the single-page watermark overlay PDF
+
+    Watermark text rarely varies between requests, so the reportlab
+    canvas work runs once per distinct (text, opacity) pair.
+    """
+    watermark_buffer = BytesIO()
+    c = canvas.Canvas(watermark_buffer, pagesize=letter)
+    c.setFillAlpha(opacity)
+    c.setFont("Helvetica-Bold", 60)
+    c.setFillColorRGB(0.5, 0.5, 0.5)
+
+    # Rotate and position watermark
+    c.saveState()
+    c.translate(letter[0] / 2, letter[1] / 2)
+    c.rotate(45)
+    c.drawCentredString(0, 0, text)
+    c.restoreState()
+    c.save()
+
+    return watermark_buffer.getvalue()
+
+
+def _do_watermark(path: Path, text: str, opacity: float) -> BytesIO:
+    """Stamp a text watermark on every page and serialize the result in memory"""
+    # A fresh PdfReader per request over the cached bytes: pypdf readers
+    # cache parsed objects internally and are not safe to share across
+    # worker threads
+    watermark_pdf = PdfReader(BytesIO(_watermark_overlay_bytes(text, opacity)))
+    watermark_page = watermark_pdf.pages[0]
+
+    with _open_reader(path) as reader:
+        writer = PdfWriter()
+
+        for page in reader.pages:
+            page.merge_page(watermark_page, over=True)
+            writer.add_page(page)
+
+        out_buf = BytesIO()
+        writer.write(out_buf)
+        return out_buf
+
+
+@app.post("/api/watermark", dependencies=[Depends(size_limit)])
 async def add_watermark(
     file: UploadFile = File(...),
     text: str = Form(default="CONFIDENTIAL"),
@@ -488,56 +786,60 @@ async def add_watermark(
         raise HTTPException(status_code=400, detail="File must be a PDF")
     
     try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        reader = PdfReader(str(temp_path))
+        temp_path = await _spool_upload(file)
+
+        out_buf = await asyncio.to_thread(_do_watermark, temp_path, text, opacity)
+
+        await aiofiles.os.remove(temp_path)
+
+        return _pdf_response(out_buf, f"watermarked_{token_hex(4)}.pdf")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _do_add_page_numbers(path: Path, position: str, start_from: int) -> BytesIO:
+    """Stamp page numbers on every page and serialize the result in memory"""
+    with _open_reader(path) as reader:
         writer = PdfWriter()
-        
-        # Create watermark PDF
-        watermark_buffer = BytesIO()
-        c = canvas.Canvas(watermark_buffer, pagesize=letter)
-        c.setFillAlpha(opacity)
-        c.setFont("Helvetica-Bold", 60)
-        c.setFillColorRGB(0.5, 0.5, 0.5)
-        
-        # Rotate and position watermark
-        c.saveState()
-        c.translate(letter[0] / 2, letter[1] / 2)
-        c.rotate(45)
-        c.drawCentredString(0, 0, text)
-        c.restoreState()
+
+        if "bottom" in position:
+            y = 30
+        else:
+            y = letter[1] - 30
+
+        if "center" in position:
+            x = letter[0] / 2
+        elif "right" in position:
+            x = letter[0] - 50
+        else:
+            x = 50
+
+        # Draw all page numbers into one overlay document so canvas setup and
+        # font embedding happen once instead of once per page
+        overlay_buffer = BytesIO()
+        c = canvas.Canvas(overlay_buffer, pagesize=letter)
+        for i in range(len(reader.pages)):
+            c.setFont("Helvetica", 10)
+            c.setFillColorRGB(0, 0, 0)
+            c.drawCentredString(x, y, str(start_from + i))
+            c.showPage()
         c.save()
-        
-        watermark_buffer.seek(0)
-        watermark_pdf = PdfReader(watermark_buffer)
-        watermark_page = watermark_pdf.pages[0]
-        
-        for page in reader.pages:
-            page.merge_page(watermark_page)
+
+        overlay_buffer.seek(0)
+        overlay = PdfReader(overlay_buffer)
+
+        for i, page in enumerate(reader.pages):
+            page.merge_page(overlay.pages[i], over=True)
             writer.add_page(page)
-        
-        output_filename = f"watermarked_{uuid.uuid4().hex[:8]}.pdf"
-        output_path = OUTPUT_DIR / output_filename
-        
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
-        
-        temp_path.unlink()
-        cleanup_file(output_path)
-        
-        return FileResponse(
-            path=str(output_path),
-            filename=output_filename,
-            media_type="application/pdf"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+        out_buf = BytesIO()
+        writer.write(out_buf)
+        return out_buf
 
 
-@app.post("/api/add-page-numbers")
+@app.post("/api/add-page-numbers", dependencies=[Depends(size_limit)])
 async def add_page_numbers(
     file: UploadFile = File(...),
     position: str = Form(default="bottom-center"),
@@ -548,75 +850,24 @@ async def add_page_numbers(
         raise HTTPException(status_code=400, detail="File must be a PDF")
     
     try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        reader = PdfReader(str(temp_path))
-        writer = PdfWriter()
-        
-        for i, page in enumerate(reader.pages):
-            # Create page number overlay
-            page_num_buffer = BytesIO()
-            c = canvas.Canvas(page_num_buffer, pagesize=letter)
-            c.setFont("Helvetica", 10)
-            c.setFillColorRGB(0, 0, 0)
-            
-            page_number = start_from + i
-            
-            if "bottom" in position:
-                y = 30
-            else:
-                y = letter[1] - 30
-            
-            if "center" in position:
-                x = letter[0] / 2
-            elif "right" in position:
-                x = letter[0] - 50
-            else:
-                x = 50
-            
-            c.drawCentredString(x, y, str(page_number))
-            c.save()
-            
-            page_num_buffer.seek(0)
-            page_num_pdf = PdfReader(page_num_buffer)
-            page.merge_page(page_num_pdf.pages[0])
-            writer.add_page(page)
-        
-        output_filename = f"numbered_{uuid.uuid4().hex[:8]}.pdf"
-        output_path = OUTPUT_DIR / output_filename
-        
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
-        
-        temp_path.unlink()
-        cleanup_file(output_path)
-        
-        return FileResponse(
-            path=str(output_path),
-            filename=output_filename,
-            media_type="application/pdf"
+        temp_path = await _spool_upload(file)
+
+        out_buf = await asyncio.to_thread(
+            _do_add_page_numbers, temp_path, position, start_from
         )
+
+        await aiofiles.os.remove(temp_path)
+
+        return _pdf_response(out_buf, f"numbered_{token_hex(4)}.pdf")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/extract-text")
-async def extract_text(file: UploadFile = File(...)):
-    """Extract text content from PDF"""
-    if not file.filename.lower().endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="File must be a PDF")
-    
-    try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        reader = PdfReader(str(temp_path))
-        
+def _do_extract_text(stream) -> tuple:
+    """Extract the text of every page, returning (total_pages, page dicts)"""
+    with _cached_reader(stream) as reader:
         extracted_text = []
         for i, page in enumerate(reader.pages):
             text = page.extract_text()
@@ -624,35 +875,39 @@ async def extract_text(file: UploadFile = File(...)):
                 "page": i + 1,
                 "content": text
             })
-        
-        temp_path.unlink()
-        
+
+        return len(reader.pages), extracted_text
+
+
+@app.post("/api/extract-text", dependencies=[Depends(size_limit)])
+async def extract_text(file: UploadFile = File(...)):
+    """Extract text content from PDF"""
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+
+    try:
+        # Read-only access: parse the upload's own spool file directly
+        # instead of copying it to UPLOAD_DIR first
+        file.file.seek(0)
+        total_pages, extracted_text = await asyncio.to_thread(_do_extract_text, file.file)
+
         return JSONResponse(content={
             "filename": file.filename,
-            "total_pages": len(reader.pages),
+            "total_pages": total_pages,
             "pages": extracted_text
         })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/get-metadata")
-async def get_metadata(file: UploadFile = File(...)):
-    """Get PDF metadata information"""
-    if not file.filename.lower().endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="File must be a PDF")
-    
-    try:
-        temp_path = UPLOAD_DIR / f"{uuid.uuid4()}_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        reader = PdfReader(str(temp_path))
-        
+def _do_get_metadata(stream, filename: str) -> dict:
+    """Collect document info and metadata into a JSON-ready dict"""
+    with _cached_reader(stream) as reader:
         metadata = reader.metadata
-        info = {
-            "filename": file.filename,
+        return {
+            "filename": filename,
             "total_pages": len(reader.pages),
             "is_encrypted": reader.is_encrypted,
             "metadata": {
@@ -665,14 +920,35 @@ async def get_metadata(file: UploadFile = File(...)):
                 "modification_date": str(metadata.get("/ModDate", "")) if metadata else "",
             }
         }
-        
-        temp_path.unlink()
-        
+
+
+@app.post("/api/get-metadata", dependencies=[Depends(size_limit)])
+async def get_metadata(file: UploadFile = File(...)):
+    """Get PDF metadata information"""
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+
+    try:
+        # Read-only access: parse the upload's own spool file directly
+        # instead of copying it to UPLOAD_DIR first
+        info = await asyncio.to_thread(_do_get_metadata, file.file, file.filename)
+
         return JSONResponse(content=info)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "main:app",
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", 8000)),
+        workers=os.cpu_count(),
+        loop="uvloop",
+        http="httptools",
+        limit_concurrency=256,
+        backlog=2048,
+    )